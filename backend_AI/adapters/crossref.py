@@ -1,14 +1,104 @@
 import httpx
 import asyncio
-from typing import List, Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
+import html
+import json
+import re
+from typing import List, Dict, Any, AsyncIterator
 from time import time
 from logger import logger
 from settings import settings
+from tracing import start_span
+
+_CROSSREF_WORKS_URL = "https://api.crossref.org/works"
 
 _cache = {}
 _CACHE_TTL = 60 * 60  # 1 hour
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_ABSTRACT_PREFIX_RE = re.compile(r"^abstract[\s:.]+", re.I)
+_ITEMS_MARKER_RE = re.compile(r'"items"\s*:\s*\[')
+
+
+def _clean_text(raw: str) -> str:
+    # Crossref titles/abstracts come as JATS/HTML fragments with entities
+    if not raw:
+        return ""
+    text = html.unescape(_TAG_RE.sub(" ", raw))
+    return _WS_RE.sub(" ", text).strip()
+
+
+class Paper:
+    """Compact Crossref candidate, normalized once at ingestion."""
+
+    __slots__ = ("doi", "title", "url", "abstract")
+
+    def __init__(self, doi: str, title: str, url: str, abstract: str):
+        self.doi = doi
+        self.title = title
+        self.url = url
+        self.abstract = abstract
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> "Paper":
+        titles = item.get("title") or [""]
+        return cls(
+            doi=item.get("DOI") or "",
+            title=_clean_text(titles[0]),
+            url=item.get("URL") or "",
+            abstract=_ABSTRACT_PREFIX_RE.sub("", _clean_text(item.get("abstract") or "")),
+        )
+
+    def __repr__(self) -> str:
+        return f"Paper(doi={self.doi!r}, title={self.title[:40]!r})"
+
+
+class _ItemStreamParser:
+    """Decodes the ``message.items`` array of a works response chunk by chunk."""
+
+    __slots__ = ("_buf", "_in_items", "done", "_decoder")
+
+    def __init__(self):
+        self._buf = ""
+        self._in_items = False
+        self.done = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items = []
+        if self.done:
+            return items
+        buf = self._buf + chunk
+        pos = 0
+
+        if not self._in_items:
+            match = _ITEMS_MARKER_RE.search(buf)
+            if not match:
+                self._buf = buf
+                return items
+            pos = match.end()
+            self._in_items = True
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self.done = True
+                break
+            try:
+                item, pos_end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # item is not complete yet, wait for more data
+                break
+            items.append(item)
+            pos = pos_end
+
+        self._buf = "" if self.done else buf[pos:]
+        return items
+
+
 def _cache_get(key):
     entry = _cache.get(key)
     if not entry:
@@ -22,12 +112,19 @@ def _cache_get(key):
 def _cache_set(key, value):
     _cache[key] = (time(), value)
 
-@retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=1, min=1, max=5))
-async def search_papers_on_crossref(query: str, limit: int = 100) -> List[Dict[str, Any]]:
+async def stream_papers_on_crossref(query: str, limit: int = 100) -> AsyncIterator[Paper]:
+    """Yields papers as soon as they are decoded from the Crossref response body."""
     key = f"crossref:{query}:{limit}"
+    # not made current: this generator yields into its consumer's context
+    trace_span = start_span("crossref.search", "crossref", query=query, limit=limit)
     cached = _cache_get(key)
+    trace_span.set(cache_hit=cached is not None)
     if cached is not None:
-        return cached
+        trace_span.set(items=len(cached))
+        trace_span.finish()
+        for paper in cached:
+            yield paper
+        return
 
     params = {
         "query.bibliographic": query,
@@ -36,16 +133,32 @@ async def search_papers_on_crossref(query: str, limit: int = 100) -> List[Dict[s
         "select": "title,URL,abstract,DOI"
     }
 
-    async with httpx.AsyncClient(timeout=settings.crossref_timeout) as client:
-        try:
-            resp = await client.get("https://api.crossref.org/works", params=params)
-            if resp.status_code == 200:
-                items = resp.json().get("message", {}).get("items", [])
-                _cache_set(key, items)
-                return items
-            else:
-                logger.warning(f"Crossref returned status {resp.status_code} for query {query}")
-        except Exception as e:
-            logger.error(f"Crossref API error: {e}")
-    return []
+    papers = []
+    parser = _ItemStreamParser()
+    started = time()
+    try:
+        async with httpx.AsyncClient(timeout=settings.crossref_timeout) as client:
+            try:
+                async with client.stream("GET", _CROSSREF_WORKS_URL, params=params) as resp:
+                    trace_span.set(status=resp.status_code)
+                    if resp.status_code != 200:
+                        logger.warning(f"Crossref returned status {resp.status_code} for query {query}")
+                        return
+                    async for chunk in resp.aiter_text():
+                        for item in parser.feed(chunk):
+                            paper = Paper.from_item(item)
+                            if not papers:
+                                trace_span.set(first_item_ms=round((time() - started) * 1000, 3))
+                            papers.append(paper)
+                            yield paper
+            except Exception as e:
+                logger.error(f"Crossref API error: {e}")
+                trace_span.set(error=type(e).__name__)
+                return
+    finally:
+        trace_span.set(items=len(papers))
+        trace_span.finish()
 
+    # only cache complete result lists
+    if parser.done:
+        _cache_set(key, papers)
@@ -5,6 +5,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from logger import logger
 from settings import settings
 from time import time
+from tracing import span
 
 _cache = {}
 _CACHE_TTL = 60 * 60  
@@ -26,10 +27,16 @@ def _cache_set(key, value):
 async def extract_abstract_from_url(url: str) -> str:
     if not url:
         return ""
-    cached = _cache_get(url)
-    if cached is not None:
-        return cached
+    with span("scrape", "scrape", url=url) as trace_span:
+        cached = _cache_get(url)
+        trace_span.set(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+        abstract = await _fetch_abstract(url)
+        trace_span.set(found=bool(abstract))
+        return abstract
 
+async def _fetch_abstract(url: str) -> str:
     headers = {'User-Agent': 'Mozilla/5.0 (compatible; ScientificAnalyzer/1.0)'}
     try:
         async with httpx.AsyncClient(timeout=settings.web_timeout, follow_redirects=True) as client:
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Deque, Dict, Optional
+
+from settings import settings
+from logger import logger
+from tracing import annotate
+
+PRIORITY_INTERACTIVE = 0  # JSON text requests
+PRIORITY_BULK = 1  # PDF uploads
+
+_PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+
+def estimate_cost(mode: str) -> int:
+    """Rough number of outbound calls (OpenAI + scraping) one analysis fans out to."""
+    if mode == "plagiarism":
+        # summary + query + input embedding, then per paper: scrape, summary, llm score, embedding
+        return 3 + settings.crossref_plagiarism_limit * 4
+    # query + ranking, then per paper: scrape, classification
+    return 2 + settings.crossref_doppelganger_limit * 2
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Admission rejected, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("client_id", "cost", "future", "seq")
+
+    def __init__(self, client_id: str, cost: int, future: asyncio.Future, seq: int):
+        self.client_id = client_id
+        self.cost = cost
+        self.future = future
+        self.seq = seq
+
+    @property
+    def granted(self) -> bool:
+        return self.future.done() and not self.future.cancelled() and self.future.exception() is None
+
+
+class AdmissionController:
+    """
+    Limits analyses running at once by count and by estimated outbound cost.
+    Requests over the limit wait in a bounded queue: higher priority classes are
+    served first, and clients within a class are served round-robin so one
+    client cannot monopolize the queue. A full queue rejects immediately, unless
+    a lower priority waiter can be evicted to make room.
+    """
+
+    def __init__(self, max_in_flight: int, max_cost: int, max_queue: int,
+                 max_queue_per_client: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_cost = max_cost
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.queue_timeout = queue_timeout
+
+        self._in_flight = 0
+        self._cost_in_flight = 0
+        self._waiting = 0
+        self._seq = itertools.count()
+        # priority -> client_id -> pending waiters; dict order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in _PRIORITIES}
+        self._avg_duration = 10.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def _fits(self, cost: int) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        # an oversized request may still run alone
+        return self._in_flight == 0 or self._cost_in_flight + cost <= self.max_cost
+
+    def _retry_after(self) -> int:
+        backlog = (self._waiting + self._in_flight) / max(self.max_in_flight, 1)
+        return max(1, round(self._avg_duration * backlog))
+
+    def _acquire(self, cost: int):
+        self._in_flight += 1
+        self._cost_in_flight += cost
+
+    def _release(self, cost: int, duration: Optional[float] = None):
+        self._in_flight -= 1
+        self._cost_in_flight -= cost
+        if duration is not None:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+        self._dispatch()
+
+    def _next_waiter(self):
+        for priority in _PRIORITIES:
+            clients = self._queues[priority]
+            if clients:
+                client_id = next(iter(clients))
+                return clients, client_id, clients[client_id][0]
+        return None
+
+    def _dispatch(self):
+        while True:
+            head = self._next_waiter()
+            if head is None:
+                return
+            clients, client_id, waiter = head
+            # strict head-of-line: a large waiting request is not starved by small ones
+            if not self._fits(waiter.cost):
+                return
+            pending = clients[client_id]
+            pending.popleft()
+            del clients[client_id]
+            if pending:
+                clients[client_id] = pending  # move client to the back of the round
+            self._waiting -= 1
+            self._acquire(waiter.cost)
+            waiter.future.set_result(None)
+
+    def _remove(self, priority: int, waiter: _Waiter):
+        clients = self._queues[priority]
+        pending = clients.get(waiter.client_id)
+        if pending is None or waiter not in pending:
+            return
+        pending.remove(waiter)
+        if not pending:
+            del clients[waiter.client_id]
+        self._waiting -= 1
+        # the queue head may have changed to a request that fits
+        self._dispatch()
+
+    def _evict_lower(self, priority: int) -> bool:
+        """Rejects the newest waiter of the lowest class below `priority`."""
+        for lower in reversed(_PRIORITIES):
+            if lower <= priority:
+                return False
+            clients = self._queues[lower]
+            if not clients:
+                continue
+            victim = max((pending[-1] for pending in clients.values()), key=lambda w: w.seq)
+            self._remove(lower, victim)
+            victim.future.set_exception(AdmissionRejected(self._retry_after()))
+            logger.warning(f"Admission queue full, evicted queued request from {victim.client_id}")
+            return True
+        return False
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, priority: int, cost: int):
+        requested = monotonic()
+        if self._waiting == 0 and self._fits(cost):
+            self._acquire(cost)
+        else:
+            await self._wait(client_id, priority, cost)
+
+        started = monotonic()
+        annotate(admission_wait_ms=round((started - requested) * 1000, 3))
+        try:
+            yield
+        finally:
+            self._release(cost, monotonic() - started)
+
+    async def _wait(self, client_id: str, priority: int, cost: int):
+        pending = self._queues[priority].get(client_id)
+        client_full = pending is not None and len(pending) >= self.max_queue_per_client
+        if client_full or (self._waiting >= self.max_queue and not self._evict_lower(priority)):
+            logger.warning(f"Admission queue full, rejecting request from {client_id}")
+            raise AdmissionRejected(self._retry_after())
+
+        waiter = _Waiter(client_id, cost, asyncio.get_running_loop().create_future(), next(self._seq))
+        self._queues[priority].setdefault(client_id, deque()).append(waiter)
+        self._waiting += 1
+        # the new waiter may be the head of a higher priority class and fit right away
+        self._dispatch()
+
+        timer = asyncio.get_running_loop().call_later(self.queue_timeout, self._expire, priority, waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            if waiter.granted:
+                # admitted concurrently with the cancellation: hand the slot back
+                self._release(cost)
+            else:
+                waiter.future.cancel()
+                self._remove(priority, waiter)
+            raise
+        finally:
+            timer.cancel()
+
+    def _expire(self, priority: int, waiter: _Waiter):
+        if waiter.future.done():
+            return
+        self._remove(priority, waiter)
+        logger.warning(f"Admission wait timed out for {waiter.client_id}")
+        waiter.future.set_exception(AdmissionRejected(self._retry_after()))
@@ -10,8 +10,13 @@ from openai import OpenAI
 from core.plagiarism import run_plagiarism_check
 from core.doppelganger import run_doppelganger_search
 from adapters.pdf_parser import extract_text_from_pdf
+from api.admission import (
+    AdmissionController, AdmissionRejected, estimate_cost,
+    PRIORITY_INTERACTIVE, PRIORITY_BULK
+)
 from settings import settings
 from logger import logger
+from tracing import collect_trace, span
 
 app = FastAPI(title="Scientific Text Analyzer")
 
@@ -25,6 +30,26 @@ app.add_middleware(
 
 client = OpenAI(api_key=settings.openai_api_key)
 
+admission = AdmissionController(
+    max_in_flight=settings.admission_max_in_flight,
+    max_cost=settings.admission_max_cost,
+    max_queue=settings.admission_queue_size,
+    max_queue_per_client=settings.admission_queue_per_client,
+    queue_timeout=settings.admission_queue_timeout,
+)
+
+
+def _client_id(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or peer not in settings.trusted_proxies:
+        return peer
+    # the right-most address not added by one of our own proxies is the client
+    for address in reversed([a.strip() for a in forwarded.split(",") if a.strip()]):
+        if address not in settings.trusted_proxies:
+            return address
+    return peer
+
 @app.post("/api/analyze")
 async def analyze_endpoint(
     request: Request,
@@ -47,6 +72,7 @@ async def analyze_endpoint(
         if not isinstance(text, str) or not text.strip():
             raise HTTPException(status_code=400, detail="text is required and must be a non-empty string")
         input_text = text
+        priority = PRIORITY_INTERACTIVE
 
     elif "multipart/form-data" in content_type:
         if mode not in ("plagiarism", "doppelganger"):
@@ -55,7 +81,41 @@ async def analyze_endpoint(
             raise HTTPException(status_code=400, detail="file is required in multipart request")
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        input_text = None
+        priority = PRIORITY_BULK
+
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported Content-Type. Use application/json or multipart/form-data.")
 
+    # debug flag: ?trace=timeline / ?trace=chrome for trace-event JSON, only when enabled in settings
+    trace_format = request.query_params.get("trace") if settings.trace_enabled else None
+    if trace_format is not None and trace_format not in ("timeline", "chrome"):
+        raise HTTPException(status_code=400, detail='trace must be "timeline" or "chrome"')
+    with collect_trace(enabled=trace_format is not None) as trace:
+        with span("analyze", "request", mode=mode, priority=priority):
+            try:
+                async with admission.admit(_client_id(request), priority, estimate_cost(mode)):
+                    payload = await _run_analysis(mode, input_text, file)
+            except AdmissionRejected as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is overloaded, please retry later",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+
+    if trace is not None:
+        payload["trace"] = trace.chrome_trace() if trace_format == "chrome" else trace.timeline()
+        if settings.trace_dump_dir:
+            try:
+                payload["trace_file"] = trace.dump_chrome(settings.trace_dump_dir)
+            except OSError as e:
+                logger.warning(f"Failed to dump trace: {e}")
+
+    return JSONResponse(payload)
+
+
+async def _run_analysis(mode: str, input_text: Optional[str], file: Optional[UploadFile]) -> dict:
+    if input_text is None:
         temp_dir = tempfile.mkdtemp()
         pdf_path = os.path.join(temp_dir, "uploaded.pdf")
         try:
@@ -63,16 +123,13 @@ async def analyze_endpoint(
                 f.write(await file.read())
             input_text = extract_text_from_pdf(pdf_path, max_chars=settings.max_pdf_chars)
             if not input_text.strip():
-                return JSONResponse({
+                return {
                     "mode": mode,
                     "result": {"type": "error", "message": "PDF contains no extractable text"}
-                })
+                }
         finally:
             shutil.rmtree(temp_dir, ignore_errors=True)
 
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported Content-Type. Use application/json or multipart/form-data.")
-
     try:
         if mode == "plagiarism":
             result = await run_plagiarism_check(input_text, client)
@@ -82,13 +139,13 @@ async def analyze_endpoint(
             raise HTTPException(status_code=400, detail="Unknown mode")
     except Exception as e:
         logger.exception("Analysis execution error")
-        return JSONResponse({
+        return {
             "mode": mode,
             "result": {"type": "error", "message": f"Internal error: {str(e)}"}
-        })
+        }
 
-    return JSONResponse({
+    return {
         "mode": mode,
         "result": result
-    })
+    }
 
@@ -1,14 +1,15 @@
 import re
-import asyncio
 from typing import Dict, Any
 from openai import OpenAI
-from adapters.crossref import search_papers_on_crossref
+from adapters.crossref import Paper, stream_papers_on_crossref
 from adapters.web_parser import extract_abstract_from_url
 from settings import settings
 from logger import logger
+from tracing import span, to_thread
+from core.pipeline import Stage, run_stream
 
 async def _run_sync(fn, *args, **kwargs):
-    return await asyncio.to_thread(fn, *args, **kwargs)
+    return await to_thread(fn, *args, **kwargs)
 
 async def generate_search_query_for_doppelganger(text: str, client: OpenAI) -> str:
     prompt = f"""
@@ -34,7 +35,8 @@ async def generate_search_query_for_doppelganger(text: str, client: OpenAI) -> s
             )
             query = resp.choices[0].message.content.strip()
             return re.sub(r'["\[\]`]', '', query)
-        return await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="doppelganger_query"):
+            return await _run_sync(sync_call)
     except Exception as e:
         logger.error(f"Error generating doppelganger query: {e}")
         return ""
@@ -63,7 +65,8 @@ async def is_doppelganger(original: str, candidate_abstract: str, client: OpenAI
                 timeout=settings.openai_timeout
             )
             return resp.choices[0].message.content.strip()
-        raw = await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="doppelganger_check"):
+            raw = await _run_sync(sync_call)
         lines = [line.strip() for line in raw.split('\n') if line.strip()]
 
         if len(lines) < 3:
@@ -138,7 +141,8 @@ async def rank_doppelgangers(doppelgangers: list, original_text: str, client: Op
                     timeout=settings.openai_timeout
                 )
                 return resp.choices[0].message.content.strip()
-            raw = await _run_sync(sync_call)
+            with span("openai.chat", "openai", op="doppelganger_rank"):
+                raw = await _run_sync(sync_call)
 
             top_indices = []
             for line in raw.split('\n'):
@@ -185,39 +189,38 @@ async def run_doppelganger_search(input_text: str, client: OpenAI) -> Dict[str,
     if not query:
         return {"type": "error", "message": "Failed to generate interdisciplinary query"}
 
-    items = await search_papers_on_crossref(query, limit=settings.crossref_doppelganger_limit)
-    doppelgangers = []
-
-    async def process_item(item):
-        title = (item.get("title") or [""])[0]
-        url = item.get("URL", "")
-        abstract = item.get("abstract", "") or ""
-
-        if not abstract or len(abstract) < 100:
-            abstract = await extract_abstract_from_url(url)
+    async def fetch_abstract(paper: Paper):
+        abstract = paper.abstract
+        if len(abstract) < 100:
+            abstract = await extract_abstract_from_url(paper.url)
             if not abstract or len(abstract) < 100:
                 return None
+        return paper, abstract
 
+    async def classify(entry):
+        paper, abstract = entry
         result = await is_doppelganger(input_text, abstract, client)
         if result["is_doppelganger"]:
             return {
-                "title": title,
-                "url": url,
+                "title": paper.title,
+                "url": paper.url,
                 "domain": result["domain"],
                 "reason": result["reason"]
             }
         return None
 
-    semaphore = asyncio.Semaphore(6)
-    async def sem_process(it):
-        async with semaphore:
-            return await process_item(it)
-
-    tasks = [sem_process(it) for it in items]
-    results = await asyncio.gather(*tasks)
-    for r in results:
-        if r:
-            doppelgangers.append(r)
+    # scraping runs ahead of classification, bounded by the prefetch queue
+    doppelgangers = await run_stream(
+        stream_papers_on_crossref(query, limit=settings.crossref_doppelganger_limit),
+        [
+            Stage("abstract", fetch_abstract,
+                  concurrency=settings.pipeline_scrape_concurrency,
+                  buffer=settings.pipeline_scrape_concurrency),
+            Stage("doppelganger", classify,
+                  concurrency=settings.pipeline_llm_concurrency,
+                  buffer=settings.pipeline_prefetch),
+        ]
+    )
 
     ranking = await rank_doppelgangers(doppelgangers, input_text, client)
 
@@ -0,0 +1,137 @@
+import asyncio
+from time import perf_counter
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Sequence
+from tracing import span
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Raised by a stage to stop the whole pipeline with a user-facing message."""
+
+
+async def _cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class StageGraph:
+    """
+    Runs named async stages concurrently, each one as soon as its dependencies
+    have finished, so total latency follows the longest chain of stages.
+    Stages must be added after their dependencies, which keeps the graph acyclic.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, tuple] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]], deps: Sequence[str] = ()):
+        """`fn` is called with the results of `deps`, in order."""
+        if name in self._stages:
+            raise ValueError(f"Stage {name!r} already added")
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self._stages[name] = (fn, tuple(deps))
+
+    async def result(self, name: str) -> Any:
+        """Waits for a stage that the caller does not depend on up front."""
+        return await asyncio.shield(self._tasks[name])
+
+    async def _run_stage(self, name: str) -> Any:
+        fn, deps = self._stages[name]
+        args = [await self.result(dep) for dep in deps]
+        with span(f"stage.{name}", "pipeline"):
+            return await fn(*args)
+
+    async def run(self) -> Dict[str, Any]:
+        self._tasks = {name: asyncio.create_task(self._run_stage(name)) for name in self._stages}
+        tasks = list(self._tasks.values())
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            await _cancel_all(tasks)
+            raise
+        return {name: task.result() for name, task in self._tasks.items()}
+
+
+class Stage:
+    """One step of a streaming pipeline, run by `concurrency` workers.
+
+    `fn` returning None drops the item. `buffer` bounds the queue in front of
+    the stage, i.e. how far the previous stage may run ahead of this one.
+    """
+
+    __slots__ = ("name", "fn", "concurrency", "buffer")
+
+    def __init__(self, name: str, fn: Callable[[Any], Awaitable[Optional[Any]]],
+                 concurrency: int = 1, buffer: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.buffer = buffer if buffer is not None else self.concurrency
+
+
+async def run_stream(source: AsyncIterable[Any], stages: Sequence[Stage]) -> List[Any]:
+    """
+    Pushes items from `source` through `stages` as they arrive and returns the
+    final stage outputs in source order. Stages work on different items at the
+    same time, connected by bounded queues.
+    """
+    queues = [asyncio.Queue(maxsize=stage.buffer) for stage in stages]
+    results = []
+
+    async def feed():
+        index = 0
+        try:
+            async for item in source:
+                await queues[0].put((index, item, perf_counter()))
+                index += 1
+        finally:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(_DONE)
+
+    async def work(position: int, stage: Stage):
+        inbox = queues[position]
+        outbox = queues[position + 1] if position + 1 < len(stages) else None
+        while True:
+            entry = await inbox.get()
+            if entry is _DONE:
+                return
+            index, item, enqueued = entry
+            with span(stage.name, "pipeline", item=index, queue_wait_ms=round((perf_counter() - enqueued) * 1000, 3)):
+                out = await stage.fn(item)
+            if out is None:
+                continue
+            if outbox is None:
+                results.append((index, out))
+            else:
+                await outbox.put((index, out, perf_counter()))
+
+    async def run_stage(position: int, stage: Stage):
+        workers = [asyncio.create_task(work(position, stage)) for _ in range(stage.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # gather does not stop sibling workers when one of them fails
+            await _cancel_all(workers)
+            raise
+        if position + 1 < len(stages):
+            for _ in range(stages[position + 1].concurrency):
+                await queues[position + 1].put(_DONE)
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(run_stage(i, stage)) for i, stage in enumerate(stages)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        await _cancel_all(tasks)
+        raise
+
+    results.sort(key=lambda r: r[0])
+    return [out for _, out in results]
@@ -1,17 +1,18 @@
 import re
 import numpy as np
-import asyncio
 from typing import Dict, Any, Optional
 from openai import OpenAI
 from sklearn.metrics.pairwise import cosine_similarity
-from adapters.crossref import search_papers_on_crossref
+from adapters.crossref import Paper, stream_papers_on_crossref
 from adapters.web_parser import extract_abstract_from_url
 from settings import settings
 from logger import logger
+from tracing import span, to_thread
+from core.pipeline import StageGraph, Stage, PipelineAborted, run_stream
 
 
 async def _run_sync(fn, *args, **kwargs):
-    return await asyncio.to_thread(fn, *args, **kwargs)
+    return await to_thread(fn, *args, **kwargs)
 
 async def generate_summary(text: str, client: OpenAI) -> str:
     prompt = f"""
@@ -33,7 +34,8 @@ async def generate_summary(text: str, client: OpenAI) -> str:
                 timeout=settings.openai_timeout
             )
             return resp.choices[0].message.content.strip()
-        return await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="summary"):
+            return await _run_sync(sync_call)
     except Exception as e:
         logger.error(f"Error generating summary: {e}")
         return ""
@@ -47,14 +49,13 @@ async def get_embedding(text: str, client: OpenAI) -> Optional[list]:
                 timeout=settings.openai_timeout
             )
             return resp.data[0].embedding
-        return await _run_sync(sync_call)
+        with span("openai.embedding", "openai", op="embedding"):
+            return await _run_sync(sync_call)
     except Exception as e:
         logger.warning(f"Embedding failed: {e}")
         return None
 
-async def get_embedding_similarity(text1: str, text2: str, client: OpenAI) -> float:
-    e1 = await get_embedding(text1, client)
-    e2 = await get_embedding(text2, client)
+def embedding_similarity(e1: Optional[list], e2: Optional[list]) -> float:
     if e1 is None or e2 is None:
         return 0.0
     sim = cosine_similarity([e1], [e2])[0][0]
@@ -76,7 +77,8 @@ async def get_llm_similarity_score(s1: str, s2: str, client: OpenAI) -> float:
             data = json.loads(resp.choices[0].message.content)
             score = float(data.get("score", 0.0))
             return float(np.clip(score, 0.0, 1.0))
-        return await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="similarity_score"):
+            return await _run_sync(sync_call)
     except Exception as e:
         logger.warning(f"LLM similarity failed: {e}")
         return 0.0
@@ -97,7 +99,8 @@ async def generate_reason(pdf_sum: str, art_sum: str, client: OpenAI) -> str:
                 timeout=settings.openai_timeout
             )
             return response.choices[0].message.content.strip()
-        return await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="reason"):
+            return await _run_sync(sync_call)
     except Exception:
         return "High semantic similarity in content."
 
@@ -126,7 +129,8 @@ async def generate_search_query_for_plagiarism(text: str, client: OpenAI) -> str
             )
             query = response.choices[0].message.content.strip()
             return re.sub(r'["\[\]`]', '', query)
-        return await _run_sync(sync_call)
+        with span("openai.chat", "openai", op="plagiarism_query"):
+            return await _run_sync(sync_call)
     except Exception as e:
         logger.error(f"Error generating plagiarism search query: {e}")
         return ""
@@ -135,35 +139,45 @@ async def run_plagiarism_check(input_text: str, client: OpenAI) -> Dict[str, Any
     if not input_text.strip():
         return {"type": "error", "message": "Input text is empty"}
 
-    summary = await generate_summary(input_text, client)
-    if not summary:
-        return {"type": "error", "message": "Failed to generate summary"}
-
-    query = await generate_search_query_for_plagiarism(input_text, client)
-    if not query:
-        return {"type": "error", "message": "Failed to generate search query"}
-
-    papers = await search_papers_on_crossref(query, limit=settings.crossref_plagiarism_limit)
+    graph = StageGraph()
     max_sim = 0.0
 
-    async def process_paper(paper):
-        nonlocal max_sim
-        title = (paper.get("title") or [""])[0] if paper.get("title") else "Untitled"
-        url = paper.get("URL", "")
-        abstract = paper.get("abstract", "")
-
-        if not abstract or len(abstract) < 50:
-            abstract = await extract_abstract_from_url(url)
+    async def summarize():
+        summary = await generate_summary(input_text, client)
+        if not summary:
+            raise PipelineAborted("Failed to generate summary")
+        return summary
+
+    async def build_query():
+        query = await generate_search_query_for_plagiarism(input_text, client)
+        if not query:
+            raise PipelineAborted("Failed to generate search query")
+        return query
+
+    async def fetch_abstract(paper: Paper):
+        abstract = paper.abstract
+        if len(abstract) < 50:
+            abstract = await extract_abstract_from_url(paper.url)
             if not abstract or len(abstract) < 50:
                 return None
+        return paper, abstract
+
+    async def embed(entry):
+        paper, abstract = entry
+        art_embedding = await get_embedding(abstract[:2000], client)
+        local_sim = embedding_similarity(await graph.result("input_embedding"), art_embedding)
+        return paper, abstract, local_sim
+
+    async def score_paper(entry):
+        nonlocal max_sim
+        paper, abstract, local_sim = entry
 
         art_summary = await generate_summary(abstract, client)
         if not art_summary:
             return None
 
-    
+        summary = await graph.result("summary")
         llm_sim = await get_llm_similarity_score(summary, art_summary, client)
-        local_sim = await get_embedding_similarity(input_text[:2000], abstract[:2000], client)
         combined_score = 0.7 * llm_sim + 0.3 * local_sim
         combined_score = float(np.clip(combined_score, 0.0, 1.0))
 
@@ -174,8 +188,8 @@ async def run_plagiarism_check(input_text: str, client: OpenAI) -> Dict[str, Any
             reason = await generate_reason(summary, art_summary, client)
             return {
                 "type": "plagiarism",
-                "url": url,
-                "title": title,
+                "url": paper.url,
+                "title": paper.title or "Untitled",
                 "reason": reason,
                 "probability": round(combined_score, 3),
                 "llm_similarity": round(llm_sim, 3),
@@ -183,25 +197,40 @@ async def run_plagiarism_check(input_text: str, client: OpenAI) -> Dict[str, Any
             }
         return None
 
+    async def find_matches(query: str):
+        # papers are scraped as Crossref streams them in, and abstracts are
+        # prefetched ahead of LLM scoring through the bounded stage queues;
+        # each stage runs at most one OpenAI call per worker
+        return await run_stream(
+            stream_papers_on_crossref(query, limit=settings.crossref_plagiarism_limit),
+            [
+                Stage("abstract", fetch_abstract,
+                      concurrency=settings.pipeline_scrape_concurrency,
+                      buffer=settings.pipeline_scrape_concurrency),
+                Stage("embedding", embed,
+                      concurrency=settings.pipeline_embedding_concurrency,
+                      buffer=settings.pipeline_embedding_concurrency),
+                Stage("score", score_paper,
+                      concurrency=settings.pipeline_llm_concurrency,
+                      buffer=settings.pipeline_prefetch),
+            ]
+        )
+
+    graph.add("summary", summarize)
+    graph.add("query", build_query)
+    graph.add("input_embedding", lambda: get_embedding(input_text[:2000], client))
+    graph.add("matches", find_matches, deps=("query",))
 
-    tasks = [process_paper(p) for p in papers]
-
-    semaphore = asyncio.Semaphore(6)
-
-    async def sem_task(t):
-        async with semaphore:
-            return await t
+    try:
+        results = await graph.run()
+    except PipelineAborted as e:
+        return {"type": "error", "message": str(e)}
 
-    results = await asyncio.gather(*(sem_task(task) for task in tasks))
-    for r in results:
-        if r is not None:
-            return r
+    if results["matches"]:
+        return results["matches"][0]
 
     return {
         "type": "no_plagiarism",
         "message": "No significant plagiarism detected",
         "max_similarity_encountered": round(max_sim, 3)
     }
-
-
-
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +16,22 @@ class Settings(BaseSettings):
     web_timeout: int = 10
     openai_timeout: int = 30
 
+    pipeline_scrape_concurrency: int = 8
+    pipeline_llm_concurrency: int = 6
+    pipeline_embedding_concurrency: int = 4
+    pipeline_prefetch: int = 16
+
+    admission_max_in_flight: int = 4
+    admission_max_cost: int = 1200
+    admission_queue_size: int = 32
+    admission_queue_per_client: int = 4
+    admission_queue_timeout: int = 60
+    # X-Forwarded-For is only honored for requests coming from these addresses
+    trusted_proxies: List[str] = []
+
+    trace_enabled: bool = False
+    trace_dump_dir: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
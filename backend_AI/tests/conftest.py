@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# settings are loaded at import time and require an API key
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
@@ -0,0 +1,292 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from api.admission import AdmissionController, AdmissionRejected, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from settings import settings
+
+
+def _controller(**overrides):
+    options = dict(max_in_flight=1, max_cost=1000, max_queue=8, max_queue_per_client=4, queue_timeout=5)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def _assert_idle(controller):
+    assert controller.in_flight == 0
+    assert controller.waiting == 0
+    assert controller._cost_in_flight == 0
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class _Jobs:
+    """Starts requests against a controller and keeps them admitted until released."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.admitted = []
+        self.rejected = {}
+        self.tasks = []
+        self._release = asyncio.Event()
+
+    def start(self, tag, client_id, priority=PRIORITY_INTERACTIVE, cost=10):
+        async def run():
+            try:
+                async with self.controller.admit(client_id, priority, cost):
+                    self.admitted.append(tag)
+                    await self._release.wait()
+            except AdmissionRejected as e:
+                self.rejected[tag] = e.retry_after
+
+        task = asyncio.create_task(run())
+        self.tasks.append(task)
+        return task
+
+    async def finish(self):
+        self._release.set()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def test_fast_path_admits_immediately():
+    async def main():
+        controller = _controller()
+        async with controller.admit("a", PRIORITY_INTERACTIVE, 10):
+            assert controller.in_flight == 1
+            assert controller.waiting == 0
+            assert controller._cost_in_flight == 10
+        _assert_idle(controller)
+
+    asyncio.run(main())
+
+
+def test_round_robin_across_clients():
+    async def main():
+        controller = _controller()
+        order = []
+        blocker = asyncio.Event()
+
+        async def job(tag, client_id):
+            async with controller.admit(client_id, PRIORITY_INTERACTIVE, 10):
+                order.append(tag)
+                if tag == "first":
+                    await blocker.wait()
+
+        tasks = [asyncio.create_task(job("first", "x"))]
+        await _settle()
+        for tag, client_id in (("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b"), ("c1", "c")):
+            tasks.append(asyncio.create_task(job(tag, client_id)))
+            await _settle()
+        blocker.set()
+        await asyncio.gather(*tasks)
+        _assert_idle(controller)
+        return order
+
+    assert asyncio.run(main()) == ["first", "a1", "b1", "c1", "a2", "a3"]
+
+
+def test_interactive_served_before_bulk():
+    async def main():
+        controller = _controller()
+        jobs = _Jobs(controller)
+        jobs.start("running", "x")
+        await _settle()
+        jobs.start("bulk", "a", PRIORITY_BULK)
+        await _settle()
+        jobs.start("interactive", "b", PRIORITY_INTERACTIVE)
+        await _settle()
+        await jobs.finish()
+        _assert_idle(controller)
+        return jobs.admitted
+
+    assert asyncio.run(main()) == ["running", "interactive", "bulk"]
+
+
+def test_waiter_that_fits_is_dispatched_behind_blocked_head():
+    async def main():
+        controller = _controller(max_in_flight=4, max_cost=1200)
+        jobs = _Jobs(controller)
+        jobs.start("b1", "a", PRIORITY_BULK, cost=403)
+        jobs.start("b2", "a", PRIORITY_BULK, cost=403)
+        await _settle()
+        jobs.start("b3", "a", PRIORITY_BULK, cost=403)
+        await _settle()
+        jobs.start("text", "b", PRIORITY_INTERACTIVE, cost=102)
+        await _settle()
+        admitted = list(jobs.admitted)
+        await jobs.finish()
+        _assert_idle(controller)
+        return admitted
+
+    assert asyncio.run(main()) == ["b1", "b2", "text"]
+
+
+def test_per_client_cap_rejects_with_retry_after():
+    async def main():
+        controller = _controller(max_queue_per_client=2)
+        jobs = _Jobs(controller)
+        jobs.start("running", "x")
+        await _settle()
+        for tag in ("a1", "a2", "a3"):
+            jobs.start(tag, "a")
+            await _settle()
+        jobs.start("b1", "b")
+        await _settle()
+        rejected = dict(jobs.rejected)
+        await jobs.finish()
+        _assert_idle(controller)
+        return rejected, jobs.admitted
+
+    rejected, admitted = asyncio.run(main())
+    assert list(rejected) == ["a3"]
+    assert rejected["a3"] >= 1
+    assert admitted == ["running", "a1", "b1", "a2"]
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def main():
+        controller = _controller(max_queue=1)
+        jobs = _Jobs(controller)
+        jobs.start("running", "x")
+        await _settle()
+        jobs.start("queued", "a")
+        await _settle()
+        jobs.start("overflow", "b")
+        await _settle()
+        rejected = dict(jobs.rejected)
+        await jobs.finish()
+        _assert_idle(controller)
+        return rejected
+
+    rejected = asyncio.run(main())
+    assert list(rejected) == ["overflow"]
+    assert rejected["overflow"] >= 1
+
+
+def test_full_queue_evicts_newest_bulk_for_interactive():
+    async def main():
+        controller = _controller(max_in_flight=2, max_queue=3)
+        jobs = _Jobs(controller)
+        jobs.start("a", "a", PRIORITY_BULK)
+        jobs.start("b", "b", PRIORITY_BULK)
+        await _settle()
+        jobs.start("c", "c", PRIORITY_BULK)
+        jobs.start("d", "d", PRIORITY_INTERACTIVE)
+        jobs.start("e", "e", PRIORITY_BULK)
+        await _settle()
+        jobs.start("f", "f", PRIORITY_INTERACTIVE)
+        await _settle()
+        rejected = dict(jobs.rejected)
+        waiting = controller.waiting
+        await jobs.finish()
+        _assert_idle(controller)
+        return rejected, waiting, jobs.admitted
+
+    rejected, waiting, admitted = asyncio.run(main())
+    assert list(rejected) == ["e"]
+    assert waiting == 3
+    assert admitted == ["a", "b", "d", "f", "c"]
+
+
+def test_full_queue_still_rejects_bulk_when_only_bulk_would_be_evicted():
+    async def main():
+        controller = _controller(max_queue=1)
+        jobs = _Jobs(controller)
+        jobs.start("running", "x")
+        await _settle()
+        jobs.start("queued", "a", PRIORITY_BULK)
+        await _settle()
+        jobs.start("overflow", "b", PRIORITY_BULK)
+        await _settle()
+        rejected = dict(jobs.rejected)
+        await jobs.finish()
+        return rejected
+
+    assert list(asyncio.run(main())) == ["overflow"]
+
+
+def test_timeout_leaves_controller_idle():
+    async def main():
+        controller = _controller(queue_timeout=0.05)
+        jobs = _Jobs(controller)
+        jobs.start("running", "x", cost=10)
+        await _settle()
+        jobs.start("late", "a", cost=20)
+        await asyncio.sleep(0.1)
+        assert controller.waiting == 0
+        assert controller._cost_in_flight == 10
+        rejected = dict(jobs.rejected)
+        await jobs.finish()
+        _assert_idle(controller)
+        return rejected
+
+    assert list(asyncio.run(main())) == ["late"]
+
+
+def test_cancelled_waiter_leaves_controller_idle():
+    async def main():
+        controller = _controller()
+        jobs = _Jobs(controller)
+        jobs.start("running", "x")
+        await _settle()
+        waiting = jobs.start("cancelled", "a", cost=20)
+        await _settle()
+        assert controller.waiting == 1
+        waiting.cancel()
+        await _settle()
+        assert controller.waiting == 0
+        await jobs.finish()
+        _assert_idle(controller)
+        return jobs.admitted
+
+    assert asyncio.run(main()) == ["running"]
+
+
+def test_cancellation_racing_admission_hands_slot_back():
+    async def main():
+        controller = _controller()
+        holding = controller.admit("x", PRIORITY_INTERACTIVE, 10)
+        await holding.__aenter__()
+
+        async def waiter():
+            async with controller.admit("a", PRIORITY_INTERACTIVE, 20):
+                pytest.fail("cancelled waiter must not run")
+
+        queued = asyncio.create_task(waiter())
+        await _settle()
+        # leaving the slot dispatches the waiter without yielding to the loop
+        await holding.__aexit__(None, None, None)
+        # the waiter has been granted the slot but has not resumed yet
+        assert controller.in_flight == 1
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        _assert_idle(controller)
+
+    asyncio.run(main())
+
+
+def _request(client_host, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (client_host, 12345)})
+
+
+def test_client_id_ignores_forwarded_for_without_trusted_proxies(monkeypatch):
+    from api.routes import _client_id
+
+    monkeypatch.setattr(settings, "trusted_proxies", [])
+    assert _client_id(_request("10.0.0.1", "1.2.3.4")) == "10.0.0.1"
+    assert _client_id(_request("10.0.0.1")) == "10.0.0.1"
+
+
+def test_client_id_uses_forwarded_for_from_trusted_proxy(monkeypatch):
+    from api.routes import _client_id
+
+    monkeypatch.setattr(settings, "trusted_proxies", ["10.0.0.1", "10.0.0.2"])
+    assert _client_id(_request("10.0.0.1", "spoofed, 1.2.3.4, 10.0.0.2")) == "1.2.3.4"
+    assert _client_id(_request("10.0.0.1")) == "10.0.0.1"
+    assert _client_id(_request("10.0.0.9", "1.2.3.4")) == "10.0.0.9"
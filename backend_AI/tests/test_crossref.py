@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from adapters import crossref
+from adapters.crossref import Paper, _ItemStreamParser, stream_papers_on_crossref
+
+ITEMS = [
+    {
+        "DOI": "10.1000/a",
+        "title": ["Drought &amp; <i>heat</i> stress"],
+        "URL": "https://doi.org/10.1000/a",
+        "abstract": "<jats:title>Abstract</jats:title><jats:p>Values in [0, 1] and sets {x} &lt; 5 &#8211; café</jats:p>",
+    },
+    {"DOI": "10.1000/b", "title": [], "URL": "https://doi.org/10.1000/b"},
+    {"DOI": "10.1000/c", "title": ["No abstract"], "abstract": None},
+]
+
+
+def _works_body(items):
+    return json.dumps({
+        "status": "ok",
+        "message-type": "work-list",
+        "message": {"facets": {}, "total-results": len(items), "items": items, "items-per-page": 20},
+    })
+
+
+def _feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items += parser.feed(chunk)
+    return items
+
+
+def test_parser_handles_every_split_point():
+    body = _works_body(ITEMS)
+    for split in range(len(body) + 1):
+        parser = _ItemStreamParser()
+        items = _feed_all(parser, [body[:split], body[split:]])
+        assert items == ITEMS, split
+        assert parser.done
+
+
+def test_parser_handles_single_character_chunks():
+    body = _works_body(ITEMS)
+    parser = _ItemStreamParser()
+    assert _feed_all(parser, body) == ITEMS
+    assert parser.done
+
+
+def test_parser_empty_items():
+    parser = _ItemStreamParser()
+    assert _feed_all(parser, [_works_body([])]) == []
+    assert parser.done
+
+
+def test_parser_truncated_body_is_not_done():
+    body = _works_body(ITEMS)
+    truncated = body[:body.index('"10.1000/c"')]
+    parser = _ItemStreamParser()
+    assert _feed_all(parser, [truncated]) == ITEMS[:2]
+    assert not parser.done
+
+
+def test_paper_from_item_cleans_text():
+    paper = Paper.from_item(ITEMS[0])
+    assert paper.doi == "10.1000/a"
+    assert paper.title == "Drought & heat stress"
+    assert paper.url == "https://doi.org/10.1000/a"
+    assert paper.abstract == "Values in [0, 1] and sets {x} < 5 – café"
+
+
+def test_paper_from_item_missing_fields():
+    assert Paper.from_item(ITEMS[1]).title == ""
+    paper = Paper.from_item(ITEMS[2])
+    assert paper.url == ""
+    assert paper.abstract == ""
+
+
+@pytest.fixture
+def crossref_body(monkeypatch):
+    """Serves the given body for every Crossref request and counts the requests."""
+    state = {"body": "", "requests": 0}
+
+    def handler(request):
+        state["requests"] += 1
+        return httpx.Response(200, text=state["body"])
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        crossref.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+    monkeypatch.setattr(crossref, "_cache", {})
+    return state
+
+
+async def _collect(query):
+    return [paper.doi async for paper in stream_papers_on_crossref(query, limit=3)]
+
+
+def test_stream_caches_complete_results(crossref_body):
+    crossref_body["body"] = _works_body(ITEMS)
+    assert asyncio.run(_collect("q")) == ["10.1000/a", "10.1000/b", "10.1000/c"]
+    assert asyncio.run(_collect("q")) == ["10.1000/a", "10.1000/b", "10.1000/c"]
+    assert crossref_body["requests"] == 1
+
+
+def test_stream_does_not_cache_truncated_results(crossref_body):
+    body = _works_body(ITEMS)
+    crossref_body["body"] = body[:body.index('"10.1000/c"')]
+    assert asyncio.run(_collect("q")) == ["10.1000/a", "10.1000/b"]
+    assert crossref._cache == {}
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from core.pipeline import PipelineAborted, Stage, StageGraph, run_stream
+
+
+async def _source(n):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_run_stream_keeps_source_order_and_drops_none():
+    async def double(x):
+        await asyncio.sleep(0.001 * (5 - x % 5))
+        return None if x % 3 == 0 else x * 2
+
+    async def inc(x):
+        return x + 1
+
+    results = asyncio.run(run_stream(_source(10), [Stage("double", double, 3), Stage("inc", inc, 2)]))
+    assert results == [3, 5, 9, 11, 15, 17]
+
+
+def test_run_stream_failure_cancels_workers():
+    calls = []
+
+    async def main():
+        async def fail_on_two(x):
+            calls.append(x)
+            if x == 2:
+                raise ValueError("boom")
+            await asyncio.sleep(0.01)
+            return x
+
+        async def passthrough(x):
+            return x
+
+        with pytest.raises(ValueError):
+            await run_stream(_source(50), [Stage("fail", fail_on_two, 3), Stage("next", passthrough, 2)])
+        await asyncio.sleep(0.05)
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return pending
+
+    assert asyncio.run(main()) == []
+    assert len(calls) < 50
+
+
+def test_stage_graph_runs_independent_stages_concurrently():
+    async def main():
+        events = []
+
+        async def stage(name, value):
+            events.append(("start", name))
+            await asyncio.sleep(0.01)
+            events.append(("end", name))
+            return value
+
+        graph = StageGraph()
+        graph.add("a", lambda: stage("a", 1))
+        graph.add("b", lambda: stage("b", 2))
+        graph.add("sum", lambda a, b: stage("sum", a + b), deps=("a", "b"))
+        return await graph.run(), events
+
+    results, events = asyncio.run(main())
+    assert results == {"a": 1, "b": 2, "sum": 3}
+    # "b" starts before "a" finishes, "sum" only after both
+    assert events.index(("start", "b")) < events.index(("end", "a"))
+    assert events.index(("start", "sum")) > max(events.index(("end", "a")), events.index(("end", "b")))
+
+
+def test_stage_graph_abort_propagates():
+    async def main():
+        async def abort():
+            raise PipelineAborted("Failed to generate summary")
+
+        async def never():
+            await asyncio.sleep(10)
+
+        graph = StageGraph()
+        graph.add("summary", abort)
+        graph.add("other", never)
+        await graph.run()
+
+    with pytest.raises(PipelineAborted, match="Failed to generate summary"):
+        asyncio.run(main())
+
+
+def test_stage_graph_rejects_unknown_dependency():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None, deps=("missing",))
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+
+from tracing import Span, collect_trace, span, start_span, to_thread, _NOOP_SPAN
+
+
+def test_disabled_trace_records_nothing():
+    with collect_trace(enabled=False) as trace:
+        assert trace is None
+        with span("outer") as s:
+            assert s is _NOOP_SPAN
+            s.set(ignored=True)
+        assert start_span("detached") is _NOOP_SPAN
+
+
+def test_span_outside_trace_is_noop():
+    with span("outer") as s:
+        assert s is _NOOP_SPAN
+
+
+def test_nested_spans_across_tasks_have_parents():
+    async def main():
+        with collect_trace() as trace:
+            with span("root"):
+                async def child(i):
+                    with span("child", index=i):
+                        with span("leaf"):
+                            await asyncio.sleep(0)
+
+                await asyncio.gather(*(asyncio.create_task(child(i)) for i in range(2)))
+        return trace
+
+    trace = asyncio.run(main())
+    by_id = {s["id"]: s for s in trace.timeline()}
+    root = next(s for s in by_id.values() if s["name"] == "root")
+    children = [s for s in by_id.values() if s["name"] == "child"]
+    leaves = [s for s in by_id.values() if s["name"] == "leaf"]
+
+    assert root["parent"] is None
+    assert len(children) == 2 and all(c["parent"] == root["id"] for c in children)
+    assert {leaf["parent"] for leaf in leaves} == {c["id"] for c in children}
+    # each task gets its own lane, separate from the request lane
+    assert root["lane"] == 0
+    assert {c["lane"] for c in children} == {1, 2}
+
+
+def test_to_thread_records_pool_wait():
+    async def main():
+        with collect_trace() as trace:
+            with span("call") as s:
+                result = await to_thread(lambda x: x * 2, 21)
+        return trace, s, result
+
+    trace, s, result = asyncio.run(main())
+    assert result == 42
+    assert isinstance(s, Span)
+    assert s.attrs["pool_wait_ms"] >= 0
+
+
+def test_span_records_error():
+    with collect_trace() as trace:
+        try:
+            with span("failing"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    assert trace.timeline()[0]["attrs"] == {"error": "ValueError"}
+
+
+def test_chrome_trace_is_serializable():
+    async def main():
+        with collect_trace() as trace:
+            with span("analyze", "request", mode="plagiarism"):
+                with span("openai.chat", "openai", op="summary"):
+                    await to_thread(time.sleep, 0.001)
+        return trace
+
+    chrome = asyncio.run(main()).chrome_trace()
+    decoded = json.loads(json.dumps(chrome))
+    events = [e for e in decoded["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events] == ["analyze", "openai.chat"]
+    for event in events:
+        assert event["pid"] == 1
+        assert isinstance(event["ts"], int) and isinstance(event["dur"], int)
+    assert events[1]["args"]["op"] == "summary"
+    assert any(e["ph"] == "M" for e in decoded["traceEvents"])
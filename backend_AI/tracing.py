@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter, time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _lane_key():
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return id(task)
+    return ("thread", threading.get_ident())
+
+
+class Span:
+    __slots__ = ("trace", "id", "parent_id", "name", "category", "lane", "start", "end", "attrs")
+
+    def __init__(self, trace: "Trace", parent: Optional["Span"], name: str, category: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.id = len(trace.spans) + 1
+        self.parent_id = parent.id if parent else None
+        self.name = name
+        self.category = category
+        self.lane = trace.lane()
+        self.start = perf_counter()
+        self.end = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.end is None:
+            self.end = perf_counter()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Spans recorded for a single request."""
+
+    def __init__(self):
+        self.id = uuid4().hex[:12]
+        self.origin = perf_counter()
+        self.spans: List[Span] = []
+        self._lanes = {}
+
+    def lane(self) -> int:
+        return self._lanes.setdefault(_lane_key(), len(self._lanes))
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        now = perf_counter()
+        return [
+            {
+                "id": s.id,
+                "parent": s.parent_id,
+                "name": s.name,
+                "category": s.category,
+                "lane": s.lane,
+                "start_ms": _ms(s.start - self.origin),
+                "duration_ms": _ms((s.end or now) - s.start),
+                "attrs": s.attrs,
+            }
+            for s in sorted(self.spans, key=lambda s: s.start)
+        ]
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace-event JSON, loadable in chrome://tracing or Perfetto."""
+        now = perf_counter()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": lane,
+             "args": {"name": "request" if lane == 0 else f"task-{lane}"}}
+            for lane in range(len(self._lanes))
+        ]
+        for s in self.spans:
+            events.append({
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "pid": 1,
+                "tid": s.lane,
+                "ts": round((s.start - self.origin) * 1e6),
+                "dur": round(((s.end or now) - s.start) * 1e6),
+                "args": s.attrs,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.id}}
+
+    def dump_chrome(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"trace-{int(time())}-{self.id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        return path
+
+
+@contextmanager
+def collect_trace(enabled: bool = True):
+    """Records spans opened in this context (and tasks spawned from it) into a new Trace."""
+    if not enabled:
+        yield None
+        return
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def start_span(name: str, category: str = "app", **attrs):
+    """Starts a span without making it current; the caller must call finish()."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    s = Span(trace, _current_span.get(), name, category, attrs)
+    trace.spans.append(s)
+    return s
+
+
+@contextmanager
+def span(name: str, category: str = "app", **attrs):
+    s = start_span(name, category, **attrs)
+    if s is _NOOP_SPAN:
+        yield s
+        return
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.finish()
+
+
+def annotate(**attrs):
+    """Adds attributes to the current span, if any."""
+    s = _current_span.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+async def to_thread(fn, *args, **kwargs):
+    """asyncio.to_thread that records the thread-pool queue wait on the current span."""
+    s = _current_span.get()
+    if s is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    submitted = perf_counter()
+
+    def run():
+        s.set(pool_wait_ms=_ms(perf_counter() - submitted))
+        return fn(*args, **kwargs)
+
+    return await asyncio.to_thread(run)